@@ -2,10 +2,12 @@ import os
 from logging import getLogger
 from pathlib import Path
 
-import chardet
-import matplotlib.pyplot as plt
+import charset_normalizer
+import numpy as np
 import pandas as pd
+import plotly.graph_objects as go
 from dotenv import load_dotenv
+from plotly.offline import get_plotlyjs_version
 from shiny import App, Inputs, Outputs, Session, reactive, render, ui
 from shiny.types import FileInfo
 
@@ -14,40 +16,64 @@ from app.data.portfolio_utils import (
     create_portfolio_performance_chart,
     create_sector_breakdown_chart,
     create_risk_return_chart,
-    fetch_portfolio_data,
+    fetch_portfolio_data_cached,
+    read_portfolio_csv,
 )
 
 # Load environment variables from .env file
 load_dotenv(Path(".env"))
 logger = getLogger(__name__)
 
+# Log level of the app's own loggers, run.py sets DEBUG in debug mode
+getLogger("app").setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+
 # Get the API key from environment variables
 API_KEY = os.getenv("ALPHA_VANTAGE_API_KEY")
 if not API_KEY:
     raise ValueError("ALPHA_VANTAGE_API_KEY is not set")
 
+# Number of bytes of an uploaded CSV file used to detect its encoding
+CSV_ENCODING_SAMPLE_SIZE = 64 * 1024
+
+
+def create_input_row(row_id: str) -> ui.Tag:
+    return ui.row(
+        ui.column(
+            6,
+            ui.input_text(f"symbol_{row_id}", "Stock Symbol", placeholder="e.g., AAPL"),
+        ),
+        ui.column(
+            6,
+            ui.input_numeric(f"shares_{row_id}", "Number of Shares", value=1, min=1),
+        ),
+        id=f"portfolio-row-{row_id}",
+    )
+
+
+# Markup of an input row rendered once, added rows only substitute their index
+INPUT_ROW_PLACEHOLDER = "__row__"
+INPUT_ROW_TEMPLATE = str(create_input_row(INPUT_ROW_PLACEHOLDER))
+
+
+def plotly_figure_html(fig: go.Figure) -> ui.HTML:
+    # plotly.js is loaded once in the page head
+    return ui.HTML(fig.to_html(include_plotlyjs=False, full_html=False))
+
+
 # Define UI
 app_ui = ui.page_fluid(
+    ui.head_content(
+        ui.tags.script(
+            src=f"https://cdn.plot.ly/plotly-{get_plotlyjs_version()}.min.js"
+        )
+    ),
     ui.div(
         ui.h2("Portfolio Tracker"),
         ui.navset_tab(
             ui.nav_panel(
                 "Manual Input",
                 ui.div(
-                    ui.row(
-                        ui.column(
-                            6,
-                            ui.input_text(
-                                "symbol_0", "Stock Symbol", placeholder="e.g., AAPL"
-                            ),
-                        ),
-                        ui.column(
-                            6,
-                            ui.input_numeric(
-                                "shares_0", "Number of Shares", value=1, min=1
-                            ),
-                        ),
-                    ),
+                    create_input_row("0"),
                     id="input-container",
                 ),
                 ui.row(
@@ -84,7 +110,7 @@ app_ui = ui.page_fluid(
             ui.column(
                 12,
                 ui.tooltip(
-                    ui.div(ui.output_plot("portfolio_performance"), class_="mb-5"),
+                    ui.div(ui.output_ui("portfolio_performance"), class_="mb-5"),
                     "This chart displays the historical performance of your portfolio and individual stocks over time.",
                 ),
             ),
@@ -93,7 +119,7 @@ app_ui = ui.page_fluid(
             ui.column(
                 12,
                 ui.tooltip(
-                    ui.div(ui.output_plot("risk_return_chart"), class_="mb-5"),
+                    ui.div(ui.output_ui("risk_return_chart"), class_="mb-5"),
                     "This scatter plot shows the risk-return profile of your stocks. Beta (x-axis) represents risk, while 52-week change (y-axis) represents return.",
                 ),
             ),
@@ -125,7 +151,7 @@ app_ui = ui.page_fluid(
                 ),
             ),
         ),
-    )
+    ),
 )
 
 
@@ -143,21 +169,8 @@ def server(input: Inputs, output: Outputs, session: Session):
         ui.insert_ui(
             selector="#input-container",
             where="beforeEnd",
-            ui=ui.row(
-                ui.column(
-                    6,
-                    ui.input_text(
-                        f"symbol_{current_count}",
-                        "Stock Symbol",
-                        placeholder="e.g., AAPL",
-                    ),
-                ),
-                ui.column(
-                    6,
-                    ui.input_numeric(
-                        f"shares_{current_count}", "Number of Shares", value=1, min=1
-                    ),
-                ),
+            ui=ui.HTML(
+                INPUT_ROW_TEMPLATE.replace(INPUT_ROW_PLACEHOLDER, str(current_count))
             ),
         )
         row_count.set(current_count + 1)
@@ -167,7 +180,7 @@ def server(input: Inputs, output: Outputs, session: Session):
     def remove_last_row():
         current_count = row_count.get()
         if current_count > 1:
-            ui.remove_ui(selector=f"#input-container .row:last-child")
+            ui.remove_ui(selector=f"#portfolio-row-{current_count - 1}")
             row_count.set(current_count - 1)
 
     @reactive.Calc
@@ -180,7 +193,7 @@ def server(input: Inputs, output: Outputs, session: Session):
     @reactive.event(input.fetch)
     def fetch_data_from_manual():
         symbols, shares = get_portfolio_data()
-        data = fetch_portfolio_data(symbols, shares, API_KEY)
+        data = fetch_portfolio_data_cached(symbols, shares, API_KEY)
         data_fetched.set(data)
         metrics = calculate_portfolio_metrics(data)
         portfolio_metrics_value.set(metrics)
@@ -202,11 +215,20 @@ def server(input: Inputs, output: Outputs, session: Session):
             file_info: FileInfo = file_infos[0]
             file_path = file_info["datapath"]
 
-            # Check file encoding
+            # Check file encoding on a bounded sample, cut at the last line break
+            # so a multi-byte character is never split
             with open(file_path, "rb") as file:
-                raw_data = file.read()
-                result = chardet.detect(raw_data)
-                file_encoding = result["encoding"]
+                raw_data = file.read(CSV_ENCODING_SAMPLE_SIZE)
+            if len(raw_data) == CSV_ENCODING_SAMPLE_SIZE:
+                raw_data = raw_data[: raw_data.rfind(b"\n") + 1] or raw_data
+            if not raw_data:
+                ui.notification_show(
+                    "Error: The CSV file is empty.", duration=None, type="error"
+                )
+                return
+
+            result = charset_normalizer.detect(raw_data)
+            file_encoding = result["encoding"] or "unknown"
 
             if file_encoding.lower() not in ["utf-8", "ascii"]:
                 ui.notification_show(
@@ -218,7 +240,7 @@ def server(input: Inputs, output: Outputs, session: Session):
 
             try:
                 # Try to read the CSV file with comma separator
-                df = pd.read_csv(file_path, encoding="utf-8", sep=",")
+                df = read_portfolio_csv(file_path)
 
                 # Check if required columns exist
                 if "symbol" not in df.columns or "shares" not in df.columns:
@@ -229,11 +251,8 @@ def server(input: Inputs, output: Outputs, session: Session):
                     )
                     return
 
-                symbols = df["symbol"].tolist()
-                shares = df["shares"].tolist()
-
                 # Additional check for data types
-                if not all(isinstance(share, (int, float)) for share in shares):
+                if not pd.api.types.is_numeric_dtype(df["shares"]):
                     ui.notification_show(
                         "Error: 'shares' column must contain numeric values.",
                         duration=None,
@@ -241,7 +260,10 @@ def server(input: Inputs, output: Outputs, session: Session):
                     )
                     return
 
-                data = fetch_portfolio_data(symbols, shares, API_KEY)
+                symbols = df["symbol"].to_numpy()
+                shares = df["shares"].to_numpy()
+
+                data = fetch_portfolio_data_cached(symbols, shares, API_KEY)
                 data_fetched.set(data)
                 metrics = calculate_portfolio_metrics(data)
                 portfolio_metrics_value.set(metrics)
@@ -282,7 +304,8 @@ def server(input: Inputs, output: Outputs, session: Session):
         data = data_fetched.get()
         if data is None or data.empty:
             return pd.DataFrame({"Message": ["No data available. Please fetch data."]})
-        return data.sort_values(by="Total Value", ascending=False)
+        # Order by descending total value, rows without a value go last
+        return data.iloc[np.argsort(-data["Total Value"].to_numpy(dtype=np.float64))]
 
     @output
     @render.plot
@@ -303,17 +326,20 @@ def server(input: Inputs, output: Outputs, session: Session):
         return metrics
 
     @output
-    @render.plot
+    @render.ui
     def portfolio_performance():
-        return portfolio_performance_chart.get()
+        fig = portfolio_performance_chart.get()
+        if fig is None:
+            return None
+        return plotly_figure_html(fig)
 
     @output
-    @render.plot(alt="Risk-Return Analysis")
+    @render.ui
     def risk_return_chart():
         data = data_fetched.get()
         if data is None or data.empty:
             return None
-        return create_risk_return_chart(data)
+        return plotly_figure_html(create_risk_return_chart(data))
 
 
 # Create the Shiny app
@@ -1,82 +1,179 @@
-import json
+import atexit
+import logging
 import sqlite3
+import threading
+from collections import OrderedDict
 from datetime import datetime
+from logging import getLogger
 from pathlib import Path
 
+import numpy as np
+import orjson
 import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
 
+logger = getLogger(__name__)
 
-class APILimitReachedException(Exception):
-    pass
+# Maximum number of Alpha Vantage requests in flight at the same time
+MAX_CONCURRENT_REQUESTS = 5
+
+API_URL = "https://www.alphavantage.co/query"
+
+# Keep-alive session shared by all API calls, so only the first request pays
+# for the TCP and TLS handshakes
+_session = requests.Session()
+_session.mount(
+    "https://",
+    HTTPAdapter(pool_connections=1, pool_maxsize=MAX_CONCURRENT_REQUESTS),
+)
+
+# Fields of a TIME_SERIES_DAILY entry, in the order of the DataFrame columns
+TS_FIELDS = ("1. open", "2. high", "3. low", "4. close", "5. volume")
+
+# Debug log of all API responses, one JSON document per line. The file is
+# opened on first use and kept open with a large write buffer.
+RESPONSE_LOG_PATH = Path("logs") / "av_responses.jsonl"
+_response_log = None
+_response_log_lock = threading.Lock()
+
+# Parsed results of fetch_stock_data for the current day, so repeated fetches
+# of a symbol skip the cache lookup and the parsing
+STOCK_DATA_CACHE_SIZE = 512
+_stock_data_memo: OrderedDict = OrderedDict()
+_stock_data_memo_lock = threading.Lock()
 
+DB_PATH = Path("database") / "stock_data.db"
+DB_PATH.parent.mkdir(parents=True, exist_ok=True)
 
-def fetch_stock_data(symbol: str, api_key: str) -> tuple[pd.DataFrame, dict]:
-    # Create a database connection
-    db_path = Path("database") / "stock_data.db"
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
+# A single connection is shared by all fetches, access is serialized by the lock
+_db_conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+_db_lock = threading.Lock()
 
-    # Create tables if they don't exist
-    cursor.execute(
+with _db_lock:
+    # WAL lets readers proceed while another fetch writes to the cache
+    _db_conn.execute("PRAGMA journal_mode=WAL")
+    _db_conn.execute("PRAGMA synchronous=NORMAL")
+    _db_conn.execute("PRAGMA temp_store=MEMORY")
+
+    # Create tables if they don't exist. julian_day holds date.toordinal() of
+    # the date/last_updated column so freshness checks are integer compares.
+    _db_conn.execute(
         """CREATE TABLE IF NOT EXISTS time_series
-                      (symbol TEXT, date TEXT, data TEXT, PRIMARY KEY (symbol, date))"""
+                      (symbol TEXT, date TEXT, data BLOB, julian_day INTEGER,
+                       PRIMARY KEY (symbol, date))"""
     )
-    cursor.execute(
+    _db_conn.execute(
         """CREATE TABLE IF NOT EXISTS overview
-                      (symbol TEXT PRIMARY KEY, data TEXT, last_updated TEXT)"""
+                      (symbol TEXT PRIMARY KEY, data TEXT, last_updated TEXT,
+                       julian_day INTEGER)"""
     )
-    conn.commit()
 
-    # Check if we have recent data in the database
-    today = datetime.now().date()
-    cursor.execute(
-        "SELECT date, data FROM time_series WHERE symbol = ? ORDER BY date DESC LIMIT 1",
-        (symbol,),
+    # Add the columns missing from caches created by older versions
+    for table, column, column_type in (
+        ("time_series", "julian_day", "INTEGER"),
+        ("overview", "julian_day", "INTEGER"),
+    ):
+        columns = [row[1] for row in _db_conn.execute(f"PRAGMA table_info({table})")]
+        if column not in columns:
+            _db_conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+
+    # Backfill day numbers of older rows, SQLite's julianday() is offset by
+    # 1721424.5 days from Python's date ordinal
+    _db_conn.execute(
+        "UPDATE time_series SET julian_day = CAST(julianday(date) - 1721424.5 AS INTEGER) WHERE julian_day IS NULL"
+    )
+    _db_conn.execute(
+        "UPDATE overview SET julian_day = CAST(julianday(last_updated) - 1721424.5 AS INTEGER) WHERE julian_day IS NULL"
     )
-    result = cursor.fetchone()
+    _db_conn.commit()
 
-    if result and (today - datetime.strptime(result[0], "%Y-%m-%d").date()).days < 1:
-        # Use cached time series data
-        ts_data = json.loads(result[1])
-    else:
-        # Fetch new time series data from API
-        ts_data = fetch_time_series_from_api(symbol, api_key)
-        # Store in database
-        cursor.execute(
-            "INSERT OR REPLACE INTO time_series (symbol, date, data) VALUES (?, ?, ?)",
-            (symbol, today.isoformat(), json.dumps(ts_data)),
+
+class APILimitReachedException(Exception):
+    pass
+
+
+def flush_cache(ts_rows: list[tuple], overview_rows: list[tuple]) -> None:
+    if not ts_rows and not overview_rows:
+        return
+
+    with _db_lock:
+        _db_conn.executemany(
+            "INSERT OR REPLACE INTO time_series (symbol, date, data, julian_day) VALUES (?, ?, ?, ?)",
+            ts_rows,
         )
-        conn.commit()
+        _db_conn.executemany(
+            "INSERT OR REPLACE INTO overview (symbol, data, last_updated, julian_day) VALUES (?, ?, ?, ?)",
+            overview_rows,
+        )
+        _db_conn.commit()
+
 
+def fetch_overview_data(symbol: str, api_key: str, overview_rows: list[tuple]) -> dict:
     # Check if we have recent overview data
-    cursor.execute(
-        "SELECT data, last_updated FROM overview WHERE symbol = ?", (symbol,)
-    )
-    result = cursor.fetchone()
+    today = datetime.now().date()
+    today_ordinal = today.toordinal()
+    with _db_lock:
+        result = _db_conn.execute(
+            "SELECT data, julian_day FROM overview WHERE symbol = ?", (symbol,)
+        ).fetchone()
 
     if (
-        result and (today - datetime.strptime(result[1], "%Y-%m-%d").date()).days < 7
+        result and result[1] is not None and today_ordinal - result[1] < 7
     ):  # Update weekly
         # Use cached overview data
-        overview_data = json.loads(result[0])
+        return orjson.loads(result[0])
+
+    # Fetch new overview data from API
+    overview_data = fetch_overview_from_api(symbol, api_key)
+    overview_rows.append(
+        (symbol, orjson.dumps(overview_data), today.isoformat(), today_ordinal)
+    )
+    return overview_data
+
+
+def fetch_stock_data(
+    symbol: str,
+    api_key: str,
+    ts_rows: list[tuple] | None = None,
+    overview_rows: list[tuple] | None = None,
+) -> tuple[pd.DataFrame, dict]:
+    # Without row buffers from the caller, write to the cache before returning
+    write_now = ts_rows is None or overview_rows is None
+    if write_now:
+        ts_rows, overview_rows = [], []
+
+    today = datetime.now().date()
+    today_ordinal = today.toordinal()
+    memo_key = (symbol, today_ordinal)
+    with _stock_data_memo_lock:
+        if memo_key in _stock_data_memo:
+            _stock_data_memo.move_to_end(memo_key)
+            return _stock_data_memo[memo_key]
+
+    # Check if we have recent data in the database
+    with _db_lock:
+        result = _db_conn.execute(
+            "SELECT julian_day, data FROM time_series WHERE symbol = ? ORDER BY date DESC LIMIT 1",
+            (symbol,),
+        ).fetchone()
+
+    if result and result[0] is not None and today_ordinal - result[0] < 1:
+        # Use cached time series data
+        ts_data = orjson.loads(result[1])
     else:
-        # Fetch new overview data from API
-        overview_data = fetch_overview_from_api(symbol, api_key)
-        # Store in database
-        cursor.execute(
-            "INSERT OR REPLACE INTO overview (symbol, data, last_updated) VALUES (?, ?, ?)",
-            (symbol, json.dumps(overview_data), today.isoformat()),
-        )
-        conn.commit()
+        # Fetch new time series data from API, the raw response is cached as is
+        ts_data, ts_raw = fetch_time_series_from_api(symbol, api_key)
+        ts_rows.append((symbol, today.isoformat(), ts_raw, today_ordinal))
+
+    overview_data = fetch_overview_data(symbol, api_key, overview_rows)
 
-    conn.close()
+    if write_now:
+        flush_cache(ts_rows, overview_rows)
 
     # Process data and return
     if "Time Series (Daily)" in ts_data:
-        df = pd.DataFrame(ts_data["Time Series (Daily)"]).T
-        df.columns = ["open", "high", "low", "close", "volume"]
-        df.index = pd.to_datetime(df.index)
+        df = parse_time_series(ts_data)
 
         # Calculate 52-week change
         if len(df) >= 252:  # Approximately 252 trading days in a year
@@ -87,6 +184,11 @@ def fetch_stock_data(symbol: str, api_key: str) -> tuple[pd.DataFrame, dict]:
         else:
             overview_data["52WeekChange"] = "N/A"
 
+        with _stock_data_memo_lock:
+            _stock_data_memo[memo_key] = (df, overview_data)
+            if len(_stock_data_memo) > STOCK_DATA_CACHE_SIZE:
+                _stock_data_memo.popitem(last=False)
+
         # Return all overview data
         return df, overview_data
     elif "Error Message" in ts_data:
@@ -95,33 +197,95 @@ def fetch_stock_data(symbol: str, api_key: str) -> tuple[pd.DataFrame, dict]:
         raise ValueError("Unexpected response format from Alpha Vantage API")
 
 
-def fetch_time_series_from_api(symbol: str, api_key: str) -> dict:
-    ts_url = f"https://www.alphavantage.co/query?function=TIME_SERIES_DAILY&symbol={symbol}&apikey={api_key}"
-    ts_response = requests.get(ts_url)
-    ts_data = ts_response.json()
+def parse_time_series(ts_data: dict) -> pd.DataFrame:
+    # Build typed arrays straight from the response instead of transposing
+    # a dict-of-dicts frame of strings
+    items = ts_data["Time Series (Daily)"]
+    dates = np.fromiter(items.keys(), dtype="datetime64[D]", count=len(items))
+    values = np.fromiter(
+        (float(day[field]) for day in items.values() for field in TS_FIELDS),
+        dtype=np.float64,
+        count=len(items) * len(TS_FIELDS),
+    ).reshape(-1, len(TS_FIELDS))
+    return pd.DataFrame(
+        values,
+        index=pd.DatetimeIndex(dates),
+        columns=["open", "high", "low", "close", "volume"],
+    )
+
 
-    # Log time series data
-    log_path = Path("logs") / f"ts_data_{symbol}.json"
-    log_path.parent.mkdir(parents=True, exist_ok=True)
-    log_path.write_text(json.dumps(ts_data, indent=2))
+def load_cached_time_series(symbols) -> dict[str, pd.DataFrame]:
+    # Latest cached daily time series of the symbols, without calling the API.
+    # Symbols without a usable series are left out of the result.
+    today_ordinal = datetime.now().date().toordinal()
+    frames = {}
+    with _stock_data_memo_lock:
+        for symbol in symbols:
+            memo = _stock_data_memo.get((symbol, today_ordinal))
+            if memo is not None:
+                frames[symbol] = memo[0]
+
+    missing = [symbol for symbol in dict.fromkeys(symbols) if symbol not in frames]
+    if not missing:
+        return frames
+
+    # One query for all remaining symbols instead of one per symbol
+    placeholders = ", ".join("?" * len(missing))
+    with _db_lock:
+        results = _db_conn.execute(
+            f"""SELECT symbol, data FROM time_series AS t
+            WHERE symbol IN ({placeholders})
+            AND date = (SELECT MAX(date) FROM time_series WHERE symbol = t.symbol)""",
+            missing,
+        ).fetchall()
+
+    for symbol, data in results:
+        ts_data = orjson.loads(data)
+        if "Time Series (Daily)" in ts_data:
+            frames[symbol] = parse_time_series(ts_data)
+    return frames
+
+
+def log_response(symbol: str, endpoint: str, data: dict) -> None:
+    # API responses are only kept for debugging
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+
+    global _response_log
+    with _response_log_lock:
+        if _response_log is None:
+            RESPONSE_LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
+            _response_log = open(RESPONSE_LOG_PATH, "ab", buffering=1 << 20)
+            atexit.register(_response_log.close)
+        _response_log.write(
+            orjson.dumps({"symbol": symbol, "endpoint": endpoint, "resp": data}) + b"\n"
+        )
+
+
+def fetch_time_series_from_api(symbol: str, api_key: str) -> tuple[dict, bytes]:
+    ts_response = _session.get(
+        API_URL,
+        params={"function": "TIME_SERIES_DAILY", "symbol": symbol, "apikey": api_key},
+    )
+    ts_data = orjson.loads(ts_response.content)
+
+    log_response(symbol, "TIME_SERIES_DAILY", ts_data)
 
     if "Information" in ts_data and "standard API rate limit" in ts_data["Information"]:
         raise APILimitReachedException(
             "Alpha Vantage API daily limit reached. Please try again tomorrow or upgrade to a premium plan."
         )
 
-    return ts_data
+    return ts_data, ts_response.content
 
 
 def fetch_overview_from_api(symbol: str, api_key: str) -> dict:
-    overview_url = f"https://www.alphavantage.co/query?function=OVERVIEW&symbol={symbol}&apikey={api_key}"
-    overview_response = requests.get(overview_url)
-    overview_data = overview_response.json()
-
-    # Log overview data
-    log_path = Path("logs") / f"overview_data_{symbol}.json"
-    log_path.parent.mkdir(parents=True, exist_ok=True)
-    log_path.write_text(json.dumps(overview_data, indent=2))
+    overview_response = _session.get(
+        API_URL, params={"function": "OVERVIEW", "symbol": symbol, "apikey": api_key}
+    )
+    overview_data = orjson.loads(overview_response.content)
+
+    log_response(symbol, "OVERVIEW", overview_data)
 
     # Check for API limit reached
     if (
@@ -1,155 +1,414 @@
-import json
+import hashlib
+import pickle
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import lru_cache, wraps
+from logging import getLogger
 from pathlib import Path
-from typing import Dict, List, Union
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple, Union
 
-import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
-import squarify
+import plotly.graph_objects as go
+
+from app.data.fetch_data import (
+    MAX_CONCURRENT_REQUESTS,
+    fetch_stock_data,
+    flush_cache,
+    load_cached_time_series,
+)
+
+if TYPE_CHECKING:
+    from matplotlib.figure import Figure as MplFigure
+
+logger = getLogger(__name__)
+
+# Charts are drawn with matplotlib, or with plotly where they are rendered
+# client-side
+Figure = Union["MplFigure", go.Figure]
+
+# Number of fetched portfolios kept by fetch_portfolio_data_cached
+PORTFOLIO_CACHE_SIZE = 32
+_portfolio_cache: "OrderedDict[tuple, pd.DataFrame]" = OrderedDict()
+_portfolio_cache_lock = threading.Lock()
+
+# Number of rendered figures kept per chart function
+CHART_CACHE_SIZE = 32
+
+
+@lru_cache(maxsize=None)
+def _matplotlib():
+    # matplotlib is imported when the first chart is drawn, fetching data and
+    # computing metrics don't pay for it
+    import matplotlib
+    import matplotlib.cm
+    import matplotlib.colors
+    import matplotlib.figure
+
+    # Charts are rendered to images on the server. Shiny's render.plot imports
+    # pyplot to encode them, which must not pick a GUI backend.
+    matplotlib.use("Agg")
+
+    # Speed up Agg rasterization of long line paths
+    matplotlib.rcParams["path.simplify"] = True
+    matplotlib.rcParams["agg.path.chunksize"] = 10000
+    return matplotlib
+
+
+def _new_figure(**kwargs) -> "MplFigure":
+    # Figures are created without pyplot, so they are not registered with a
+    # global figure manager, never need to be closed and can be drawn from
+    # any thread
+    return _matplotlib().figure.Figure(**kwargs)
+
+
+def _frame_digest(df: pd.DataFrame) -> bytes:
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update("\0".join(map(str, df.columns)).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return digest.digest()
+
+
+def cache_chart(
+    create_chart: Callable[[pd.DataFrame], Figure]
+) -> Callable[[pd.DataFrame], Figure]:
+    # Reuse the figure rendered for a DataFrame with the same content.
+    # Matplotlib figures are kept pickled and every call gets its own copy,
+    # because Shiny's render.plot changes the size, dpi and layout engine of
+    # the figure it encodes. Unpickling is several times cheaper than drawing
+    # the chart again. Plotly figures are only read to build their HTML and
+    # are shared.
+    figures: "OrderedDict[bytes, Union[bytes, go.Figure]]" = OrderedDict()
+
+    @wraps(create_chart)
+    def wrapper(df: pd.DataFrame) -> Figure:
+        key = _frame_digest(df)
+        if key in figures:
+            figures.move_to_end(key)
+            cached = figures[key]
+            return pickle.loads(cached) if isinstance(cached, bytes) else cached
+
+        fig = create_chart(df)
+        figures[key] = fig if isinstance(fig, go.Figure) else pickle.dumps(fig)
+        if len(figures) > CHART_CACHE_SIZE:
+            figures.popitem(last=False)
+        return fig
+
+    return wrapper
 
-from app.data.fetch_data import fetch_stock_data
+
+def _downcast(df: pd.DataFrame) -> pd.DataFrame:
+    # Store whole share counts in the smallest integer type that holds them.
+    # Prices and values stay float64, float32 would show rounding errors in
+    # the displayed cents.
+    if "Shares" in df.columns:
+        df["Shares"] = pd.to_numeric(df["Shares"], downcast="integer")
+    return df
 
 
 def create_portfolio_dataframe(
     portfolio_data: List[Dict[str, Union[str, int, float]]]
 ) -> pd.DataFrame:
-    df = pd.DataFrame(portfolio_data)
+    df = pd.DataFrame.from_records(portfolio_data)
     if not df.empty and "Total Value" not in df.columns:
-        df["Total Value"] = df["Shares"] * df["Latest Close"]
-    return df
+        shares = df["Shares"].to_numpy(dtype=np.float64)
+        latest_close = df["Latest Close"].to_numpy(dtype=np.float64)
+        df["Total Value"] = shares * latest_close
+    return _downcast(df)
+
+
+def read_portfolio_csv(file_path: Union[str, Path]) -> pd.DataFrame:
+    try:
+        # The pyarrow engine parses natively and keeps Arrow-backed columns
+        return pd.read_csv(
+            file_path,
+            encoding="utf-8",
+            sep=",",
+            engine="pyarrow",
+            dtype_backend="pyarrow",
+        )
+    except ImportError:
+        # pyarrow is optional, fall back to the default C engine
+        return pd.read_csv(file_path, encoding="utf-8", sep=",", low_memory=False)
+
+
+# Columns of the portfolio table, rows are built as tuples in this order
+PORTFOLIO_COLUMNS = (
+    "Symbol",
+    "Name",
+    "Asset Type",
+    "Sector",
+    "Industry",
+    "Shares",
+    "Latest Close",
+    "Total Value",
+    "Market Cap",
+    "PE Ratio",
+    "PEG Ratio",
+    "Book Value",
+    "Dividend Yield",
+    "EPS",
+    "Beta",
+    "52 Week High",
+    "52 Week Low",
+    "50 Day MA",
+    "200 Day MA",
+    "52WeekChange",
+    "Error",
+)
+
+
+# Ticker symbols accepted by fetch_portfolio_data, ASCII letters and digits
+_SYM_RE = re.compile(r"[A-Za-z0-9]+")
+
+# Numeric columns built as typed arrays, error rows hold NaN
+FLOAT_COLUMNS = ("Latest Close", "Total Value")
+
+
+def _error_row(symbol: str, error: str) -> Tuple:
+    return (symbol,) + (np.nan,) * (len(PORTFOLIO_COLUMNS) - 2) + (error,)
+
+
+def fetch_portfolio_row(
+    normalized_symbol: str,
+    share_count: int,
+    api_key: str,
+    ts_rows: List[tuple],
+    overview_rows: List[tuple],
+) -> Tuple:
+    # Returns the row values in PORTFOLIO_COLUMNS order, the symbol must
+    # already be validated and normalized
+    try:
+        df, overview = fetch_stock_data(
+            normalized_symbol, api_key, ts_rows, overview_rows
+        )
+        closes = df["close"].to_numpy(dtype=np.float64, copy=False)
+        latest_close = float(closes[0])
+        total_value = share_count * latest_close
+
+        # Calculate 52-week change, approximately 252 trading days in a year.
+        # Without a full year of data, use the oldest available data point.
+        year_ago_price = closes[251] if closes.size >= 252 else closes[-1]
+        week_52_change = (latest_close - year_ago_price) / year_ago_price
+
+        week_52_change = (
+            f"{week_52_change:.4f}"  # Convert to string with 4 decimal places
+        )
+
+        return (
+            normalized_symbol,
+            overview.get("Name", "N/A"),
+            overview.get("AssetType", "N/A"),
+            overview.get("Sector", "N/A"),
+            overview.get("Industry", "N/A"),
+            share_count,
+            latest_close,
+            total_value,
+            overview.get("MarketCapitalization", "N/A"),
+            overview.get("PERatio", "N/A"),
+            overview.get("PEGRatio", "N/A"),
+            overview.get("BookValue", "N/A"),
+            overview.get("DividendYield", "N/A"),
+            overview.get("EPS", "N/A"),
+            overview.get("Beta", "N/A"),
+            overview.get("52WeekHigh", "N/A"),
+            overview.get("52WeekLow", "N/A"),
+            overview.get("50DayMovingAverage", "N/A"),
+            overview.get("200DayMovingAverage", "N/A"),
+            week_52_change,
+            np.nan,
+        )
+    except ValueError as e:
+        return _error_row(normalized_symbol, str(e))
 
 
 def fetch_portfolio_data(
     symbols: List[str], shares: List[int], api_key: str
 ) -> pd.DataFrame:
-    portfolio_data = []
+    # Validate and normalize the symbols up front, so only valid symbols are
+    # handed to a worker. Rows keep the input order.
+    portfolio_data: List[Optional[Tuple]] = []
+    jobs: List[Tuple[int, str, int]] = []
     for symbol, share_count in zip(symbols, shares):
-        if symbol and share_count:
-            normalized_symbol = symbol.strip().upper()
-            if not normalized_symbol.isalnum():
-                portfolio_data.append(
-                    {"Symbol": symbol.strip(), "Error": "Invalid symbol format"}
-                )
-                continue
-
-            try:
-                df, overview = fetch_stock_data(normalized_symbol, api_key)
-                latest_data = df.iloc[0]
-                latest_close = float(latest_data["close"])
-                total_value = share_count * latest_close
-
-                # Calculate 52-week change
-                if len(df) >= 252:  # Approximately 252 trading days in a year
-                    year_ago_price = (
-                        df["close"].astype(float).iloc[min(251, len(df) - 1)]
-                    )
-                    week_52_change = (latest_close - year_ago_price) / year_ago_price
-                else:
-                    # If we don't have a full year of data, calculate change from the oldest available data point
-                    oldest_price = df["close"].astype(float).iloc[-1]
-                    week_52_change = (latest_close - oldest_price) / oldest_price
-
-                week_52_change = (
-                    f"{week_52_change:.4f}"  # Convert to string with 4 decimal places
-                )
-
-                portfolio_data.append(
-                    {
-                        "Symbol": normalized_symbol,
-                        "Name": overview.get("Name", "N/A"),
-                        "Asset Type": overview.get("AssetType", "N/A"),
-                        "Sector": overview.get("Sector", "N/A"),
-                        "Industry": overview.get("Industry", "N/A"),
-                        "Shares": share_count,
-                        "Latest Close": latest_close,
-                        "Total Value": total_value,
-                        "Market Cap": overview.get("MarketCapitalization", "N/A"),
-                        "PE Ratio": overview.get("PERatio", "N/A"),
-                        "PEG Ratio": overview.get("PEGRatio", "N/A"),
-                        "Book Value": overview.get("BookValue", "N/A"),
-                        "Dividend Yield": overview.get("DividendYield", "N/A"),
-                        "EPS": overview.get("EPS", "N/A"),
-                        "Beta": overview.get("Beta", "N/A"),
-                        "52 Week High": overview.get("52WeekHigh", "N/A"),
-                        "52 Week Low": overview.get("52WeekLow", "N/A"),
-                        "50 Day MA": overview.get("50DayMovingAverage", "N/A"),
-                        "200 Day MA": overview.get("200DayMovingAverage", "N/A"),
-                        "52WeekChange": week_52_change,
-                    }
-                )
-            except ValueError as e:
-                portfolio_data.append({"Symbol": normalized_symbol, "Error": str(e)})
-
-    return pd.DataFrame(portfolio_data)
-
-
-def create_asset_allocation_chart(df: pd.DataFrame) -> plt.Figure:
-    if "Error" in df.columns:
-        return plt.Figure()
-
-    # Sort the dataframe by Total Value in descending order
-    df_sorted = df.sort_values("Total Value", ascending=False)
-
-    # Create lists for treemap input
-    sizes = df_sorted["Total Value"].tolist()
-    labels = [
-        f"{row['Symbol']}\n${row['Total Value']:,.0f}"
-        for _, row in df_sorted.iterrows()
-    ]
-    colors = plt.cm.viridis(np.linspace(0, 1, len(sizes)))
+        if not (symbol and share_count):
+            continue
+
+        symbol = symbol.strip()
+        if not _SYM_RE.fullmatch(symbol):
+            portfolio_data.append(_error_row(symbol, "Invalid symbol format"))
+        else:
+            jobs.append((len(portfolio_data), symbol.upper(), share_count))
+            portfolio_data.append(None)
+
+    # Cache writes are collected and committed once, even if a fetch fails
+    ts_rows: List[tuple] = []
+    overview_rows: List[tuple] = []
+
+    def fetch_job(job: Tuple[int, str, int]) -> Tuple:
+        _, normalized_symbol, share_count = job
+        return fetch_portfolio_row(
+            normalized_symbol,
+            share_count,
+            api_key,
+            ts_rows,
+            overview_rows,
+        )
+
+    # The requests are I/O bound, so run them concurrently while staying within
+    # the Alpha Vantage rate limit
+    try:
+        if jobs:
+            with ThreadPoolExecutor(
+                max_workers=min(MAX_CONCURRENT_REQUESTS, len(jobs))
+            ) as executor:
+                for (index, _, _), row in zip(jobs, executor.map(fetch_job, jobs)):
+                    portfolio_data[index] = row
+    finally:
+        flush_cache(ts_rows, overview_rows)
+
+    if not portfolio_data:
+        return pd.DataFrame()
+
+    # Transpose the row tuples into one list per column
+    columns = dict(zip(PORTFOLIO_COLUMNS, map(list, zip(*portfolio_data))))
+    for name in FLOAT_COLUMNS:
+        columns[name] = np.fromiter(
+            columns[name], dtype=np.float64, count=len(portfolio_data)
+        )
+
+    # Charts and metrics check for the Error column, keep it only if needed
+    if not any(isinstance(error, str) for error in columns["Error"]):
+        del columns["Error"]
+
+    return _downcast(pd.DataFrame(columns, copy=False))
+
+
+def fetch_portfolio_data_cached(
+    symbols: List[str], shares: List[int], api_key: str
+) -> pd.DataFrame:
+    # Identical submits on the same day reuse the previous result, the day
+    # ordinal is part of the key so cached portfolios expire at midnight.
+    # The returned DataFrame is shared between calls and must not be mutated.
+    key = (
+        tuple(zip(symbols, shares)),
+        api_key,
+        datetime.now().date().toordinal(),
+    )
+    with _portfolio_cache_lock:
+        if key in _portfolio_cache:
+            _portfolio_cache.move_to_end(key)
+            return _portfolio_cache[key]
+
+    data = fetch_portfolio_data(symbols, shares, api_key)
+
+    # Failed rows may be temporary, like a rate limit or an outage, so
+    # portfolios with errors are fetched again on the next submit
+    if "Error" not in data.columns:
+        with _portfolio_cache_lock:
+            _portfolio_cache[key] = data
+            if len(_portfolio_cache) > PORTFOLIO_CACHE_SIZE:
+                _portfolio_cache.popitem(last=False)
+    return data
+
+
+def _sum_by(df: pd.DataFrame, column: str) -> Tuple[np.ndarray, np.ndarray]:
+    # Total Value per distinct value of a column, in order of appearance.
+    # Missing values get the code -1 and are left out, like in a groupby.
+    codes, uniques = pd.factorize(df[column])
+    valid = codes >= 0
+    total_values = np.nan_to_num(df["Total Value"].to_numpy(dtype=np.float64))
+    sums = np.bincount(
+        codes[valid], weights=total_values[valid], minlength=len(uniques)
+    )
+    return np.asarray(uniques), sums
+
+
+def _has_chart_data(df: pd.DataFrame) -> bool:
+    # Charts are only drawn for portfolios without failed fetches that hold
+    # some value
+    return "Error" not in df.columns and not df.empty and df["Total Value"].sum() > 0
+
+
+@cache_chart
+def create_asset_allocation_chart(df: pd.DataFrame) -> "MplFigure":
+    import squarify
+
+    if not _has_chart_data(df):
+        return _new_figure()
+
+    # Sort by Total Value in descending order
+    total_values = df["Total Value"].to_numpy(dtype=np.float64)
+    order = np.argsort(-total_values, kind="stable")
+
+    # Create arrays for treemap input
+    sizes = total_values[order]
+    symbols = df["Symbol"].to_numpy()[order]
+    labels = [f"{symbol}\n${value:,.0f}" for symbol, value in zip(symbols, sizes)]
+    matplotlib = _matplotlib()
+    viridis = matplotlib.colormaps["viridis"]
+    colors = viridis(np.linspace(0, 1, len(sizes)))
 
     # Create the treemap
-    fig, ax = plt.subplots(figsize=(12, 8))
+    fig = _new_figure(figsize=(12, 8))
+    ax = fig.subplots()
     squarify.plot(
-        sizes=sizes, label=labels, color=colors, alpha=0.8, text_kwargs={"fontsize": 8}
+        sizes=sizes,
+        label=labels,
+        color=colors,
+        ax=ax,
+        alpha=0.8,
+        text_kwargs={"fontsize": 8},
     )
 
-    plt.title("Portfolio Composition", fontsize=16)
-    plt.axis("off")
+    ax.set_title("Portfolio Composition", fontsize=16)
+    ax.axis("off")
 
     # Add a color bar to represent value
-    sm = plt.cm.ScalarMappable(
-        cmap=plt.cm.viridis, norm=plt.Normalize(vmin=min(sizes), vmax=max(sizes))
+    sm = matplotlib.cm.ScalarMappable(
+        cmap=viridis,
+        norm=matplotlib.colors.Normalize(vmin=sizes.min(), vmax=sizes.max()),
     )
     sm.set_array([])
-    cbar = plt.colorbar(sm)
+    cbar = fig.colorbar(sm, ax=ax)
     cbar.set_label("Total Value ($)", rotation=270, labelpad=25)
 
-    plt.tight_layout(pad=3.0, rect=[0, 0.05, 1, 0.95])
+    fig.tight_layout(pad=3.0, rect=[0, 0.05, 1, 0.95])
     return fig
 
 
-def create_sector_breakdown_chart(df: pd.DataFrame) -> plt.Figure:
-    if "Error" in df.columns:
-        return plt.Figure()
+@cache_chart
+def create_sector_breakdown_chart(df: pd.DataFrame) -> "MplFigure":
+    if not _has_chart_data(df):
+        return _new_figure()
 
-    sector_allocation = (
-        df.groupby("Sector")["Total Value"].sum().sort_values(ascending=True)
-    )
+    # Bars in ascending order of the sector values
+    sectors, sector_values = _sum_by(df, "Sector")
+    order = np.argsort(sector_values, kind="stable")
+    widths = sector_values[order]
 
-    fig, ax = plt.subplots(figsize=(10, 6))
-    bars = ax.barh(sector_allocation.index, sector_allocation.values)
+    fig = _new_figure(figsize=(10, 6))
+    ax = fig.subplots()
+    bars = ax.barh(sectors[order], widths)
 
-    # Add value labels to the end of each bar
-    for bar in bars:
-        width = bar.get_width()
+    # Label each bar with its value at the end and its share of the total
+    # inside
+    percentages = widths / widths.sum() * 100
+    for bar, width, percentage in zip(bars, widths, percentages):
+        y = bar.get_y() + bar.get_height() / 2
         ax.text(
             width,
-            bar.get_y() + bar.get_height() / 2,
+            y,
             f"${width:,.0f}",
             ha="left",
             va="center",
             fontweight="bold",
         )
-
-    # Add percentage labels inside each bar
-    total = sector_allocation.sum()
-    for bar in bars:
-        width = bar.get_width()
-        percentage = (width / total) * 100
         ax.text(
             width / 2,
-            bar.get_y() + bar.get_height() / 2,
+            y,
             f"{percentage:.1f}%",
             ha="center",
             va="center",
@@ -162,145 +421,153 @@ def create_sector_breakdown_chart(df: pd.DataFrame) -> plt.Figure:
     ax.spines["top"].set_visible(False)
     ax.spines["right"].set_visible(False)
 
-    plt.tight_layout(pad=3.0, rect=[0, 0.05, 1, 0.95])
+    fig.tight_layout(pad=3.0, rect=[0, 0.05, 1, 0.95])
     return fig
 
 
+def _symbol_at(symbols: np.ndarray, values: np.ndarray, pick: Callable) -> str:
+    # Symbol at the position picked by nanargmax/nanargmin, rows without a
+    # value (failed fetches) are ignored
+    if np.isnan(values).all():
+        return "N/A"
+    return symbols[pick(values)]
+
+
 def calculate_portfolio_metrics(df: pd.DataFrame) -> pd.DataFrame:
-    total_value = df["Total Value"].sum()
+    if df.empty:
+        symbols = np.array([], dtype=object)
+        total_values = shares = latest_closes = np.array([], dtype=np.float64)
+    else:
+        symbols = df["Symbol"].to_numpy()
+        total_values = df["Total Value"].to_numpy(dtype=np.float64)
+        shares = df["Shares"].to_numpy(dtype=np.float64)
+        latest_closes = df["Latest Close"].to_numpy(dtype=np.float64)
+    total_value = np.nansum(total_values)
+
+    number_of_sectors = most_represented_sector = "N/A"
+    if "Sector" in df.columns:
+        sectors, sector_values = _sum_by(df, "Sector")
+        number_of_sectors = len(sectors)
+        if number_of_sectors:
+            most_represented_sector = sectors[sector_values.argmax()]
 
     metrics = {
         "Total Portfolio Value": total_value,
         "Number of Assets": len(df),
         "Average Asset Value": total_value / len(df) if len(df) > 0 else 0,
-        "Highest Value Asset": (
-            df.loc[df["Total Value"].idxmax(), "Symbol"] if not df.empty else "N/A"
-        ),
-        "Lowest Value Asset": (
-            df.loc[df["Total Value"].idxmin(), "Symbol"] if not df.empty else "N/A"
-        ),
-        "Most Shares Held": (
-            df.loc[df["Shares"].idxmax(), "Symbol"] if not df.empty else "N/A"
-        ),
-        "Least Shares Held": (
-            df.loc[df["Shares"].idxmin(), "Symbol"] if not df.empty else "N/A"
-        ),
-        "Highest Price Asset": (
-            df.loc[df["Latest Close"].idxmax(), "Symbol"] if not df.empty else "N/A"
-        ),
-        "Lowest Price Asset": (
-            df.loc[df["Latest Close"].idxmin(), "Symbol"] if not df.empty else "N/A"
-        ),
-        "Number of Sectors": (
-            df["Sector"].nunique() if "Sector" in df.columns else "N/A"
-        ),
-        "Most Represented Sector": (
-            df.groupby("Sector")["Total Value"].sum().idxmax()
-            if "Sector" in df.columns
-            else "N/A"
-        ),
+        "Highest Value Asset": _symbol_at(symbols, total_values, np.nanargmax),
+        "Lowest Value Asset": _symbol_at(symbols, total_values, np.nanargmin),
+        "Most Shares Held": _symbol_at(symbols, shares, np.nanargmax),
+        "Least Shares Held": _symbol_at(symbols, shares, np.nanargmin),
+        "Highest Price Asset": _symbol_at(symbols, latest_closes, np.nanargmax),
+        "Lowest Price Asset": _symbol_at(symbols, latest_closes, np.nanargmin),
+        "Number of Sectors": number_of_sectors,
+        "Most Represented Sector": most_represented_sector,
     }
 
     return pd.DataFrame(list(metrics.items()), columns=["Metric", "Value"])
 
 
-def create_portfolio_performance_chart(portfolio_data):
-    all_data = pd.DataFrame()
-    total_value = pd.Series(dtype=float)
-
-    for symbol, data in portfolio_data.items():
-        with open(Path(f"logs/ts_data_{symbol}.json")) as f:
-            stock_data = json.load(f)
-
-        df = pd.DataFrame(stock_data["Time Series (Daily)"]).T
-        df.index = pd.to_datetime(df.index)
-        df = df.sort_index()
-
-        close_prices = df["4. close"].astype(float) * data["shares"]
-        all_data[symbol] = close_prices
+def create_portfolio_performance_chart(portfolio_data) -> go.Figure:
+    # Read the series cached by the portfolio fetch, skip unknown symbols
+    frames = load_cached_time_series(portfolio_data)
+    closes = {
+        symbol: frames[symbol]["close"] for symbol in portfolio_data if symbol in frames
+    }
 
-        if total_value.empty:
-            total_value = close_prices
-        else:
-            total_value = total_value.add(close_prices, fill_value=0)
-
-    all_data["Total Portfolio"] = total_value
-
-    fig, ax = plt.subplots(figsize=(12, 6))
-    for column in all_data.columns:
-        if column == "Total Portfolio":
-            ax.plot(
-                all_data.index,
-                all_data[column],
-                label=column,
-                linewidth=3,
-                color="black",
+    # Align all symbols on the union of their dates in a single join, then
+    # weight the close prices by the share counts in one broadcast multiply.
+    # Scattergl draws the lines with WebGL in the browser.
+    traces = []
+    if closes:
+        aligned = pd.concat(closes, axis=1).sort_index()
+        shares = np.fromiter(
+            (portfolio_data[symbol]["shares"] for symbol in aligned.columns),
+            dtype=np.float64,
+            count=len(aligned.columns),
+        )
+        values = aligned.to_numpy(dtype=np.float64) * shares
+        traces = [
+            go.Scattergl(x=aligned.index, y=values[:, i], name=symbol, mode="lines")
+            for i, symbol in enumerate(aligned.columns)
+        ]
+        traces.append(
+            go.Scattergl(
+                x=aligned.index,
+                y=np.nansum(values, axis=1),
+                name="Total Portfolio",
+                mode="lines",
+                line={"width": 3, "color": "black"},
             )
-        else:
-            ax.plot(all_data.index, all_data[column], label=column)
+        )
 
-    ax.set_title("Portfolio Performance Over Time")
-    ax.set_xlabel("Date")
-    ax.set_ylabel("Value ($)")
-    ax.legend(loc="center left", bbox_to_anchor=(1, 0.5), fontsize="small")
-    ax.grid(True)
-    plt.tight_layout(pad=3.0, rect=[0, 0.05, 1, 0.95])
+    # The figure is built from all traces at once instead of growing it
+    fig = go.Figure(data=traces)
+    fig.update_layout(
+        title="Portfolio Performance Over Time",
+        xaxis_title="Date",
+        yaxis_title="Value ($)",
+    )
 
     return fig
 
 
-def create_risk_return_chart(df: pd.DataFrame) -> plt.Figure:
-    if "Error" in df.columns:
-        return plt.Figure()
+@cache_chart
+def create_risk_return_chart(df: pd.DataFrame) -> go.Figure:
+    if not _has_chart_data(df) or "Beta" not in df.columns:
+        return go.Figure()
 
-    fig, ax = plt.subplots(figsize=(10, 6))
-
-    print("Debug: DataFrame columns:", df.columns)
-    print("Debug: Beta values:", df["Beta"])
-    print("Debug: 52WeekChange values:", df["52WeekChange"])
-
-    x = df["Beta"].apply(lambda x: float(x) if x not in ["N/A", None] else np.nan)
-    y = (
-        df["52WeekChange"].apply(
-            lambda x: float(x) if x not in ["N/A", None] else np.nan
-        )
-        * 100
-    )
-
-    print("Debug: Converted x values:", x)
-    print("Debug: Converted y values:", y)
+    # Values that are not numbers, like "N/A", become NaN
+    x = pd.to_numeric(df["Beta"], errors="coerce")
+    y = pd.to_numeric(df["52WeekChange"], errors="coerce") * 100
 
     # Remove rows with NaN values
-    valid_data = df[~(np.isnan(x) | np.isnan(y))]
-    x = x[~np.isnan(x) & ~np.isnan(y)]
-    y = y[~np.isnan(x) & ~np.isnan(y)]
-
-    print("Debug: Valid data points:", len(valid_data))
+    mask = x.notna() & y.notna()
+    valid_data = df[mask]
+    x = x[mask]
+    y = y[mask]
+    logger.debug(
+        "Risk-return chart: %d of %d rows are plotted", len(valid_data), len(df)
+    )
 
     if len(valid_data) == 0:
-        ax.text(
-            0.5,
-            0.5,
-            "No valid data points for Risk-Return chart",
-            ha="center",
-            va="center",
-            transform=ax.transAxes,
+        fig = go.Figure()
+        fig.add_annotation(
+            text="No valid data points for Risk-Return chart",
+            x=0.5,
+            y=0.5,
+            xref="paper",
+            yref="paper",
+            showarrow=False,
         )
         return fig
 
-    size = valid_data["Total Value"] / valid_data["Total Value"].max() * 500
-
-    scatter = ax.scatter(
-        x, y, s=size, c=valid_data["Sector"].astype("category").cat.codes, alpha=0.6
+    # Marker diameter grows with the square root of the value, so the marker
+    # area is proportional to it
+    size = np.sqrt(valid_data["Total Value"] / valid_data["Total Value"].max()) * 40
+
+    fig = go.Figure(
+        go.Scattergl(
+            x=x,
+            y=y,
+            mode="markers+text",
+            text=valid_data["Symbol"],
+            textposition="top right",
+            customdata=valid_data["Sector"],
+            hovertemplate="%{text}<br>Sector: %{customdata}<extra></extra>",
+            marker={
+                "size": size,
+                "color": valid_data["Sector"].astype("category").cat.codes,
+                "colorscale": "Viridis",
+                "opacity": 0.6,
+                "colorbar": {"title": "Sector"},
+            },
+        )
     )
 
-    for i, txt in enumerate(valid_data["Symbol"]):
-        ax.annotate(txt, (x.iloc[i], y.iloc[i]))
-
-    ax.set_xlabel("Beta (Risk)")
-    ax.set_ylabel("52 Week Change (%)")
-    ax.set_title("Risk-Return Analysis of Portfolio")
-    plt.colorbar(scatter, label="Sector")
-
-    plt.tight_layout(pad=3.0, rect=[0, 0.05, 1, 0.95])
+    fig.update_layout(
+        title="Risk-Return Analysis of Portfolio",
+        xaxis_title="Beta (Risk)",
+        yaxis_title="52 Week Change (%)",
+    )
     return fig
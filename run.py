@@ -1,4 +1,5 @@
 import argparse
+import os
 
 from shiny import run_app
 
@@ -10,11 +11,15 @@ if __name__ == "__main__":
     )
     args = parser.parse_args()
 
+    # Read by the app process, also when it is spawned by the reloader
+    if args.debug:
+        os.environ["LOG_LEVEL"] = "DEBUG"
+
     run_app(
         "app.app:app",
         port=args.port,
         host="0.0.0.0",
         log_level="debug" if args.debug else "info",
-        reload=True,  # Disable auto-reload
+        reload=args.debug,  # Auto-reload on code changes only in debug mode
         dev_mode=args.debug,
     )